@@ -0,0 +1,106 @@
+"""
+Builds the dictionary file used by ruzzle_bare_minimum.py.
+
+Reads TWL06Trimmed.txt and compresses it into a DAWG (a trie where words with the same endings share nodes), which is
+written to TWL06Trimmed.dawg. Only rerun this if the dictionary changes. Words longer than MAX_WORD_LEN are left out,
+since they can never fit on the board. The word list must be sorted.
+
+The file is a flat array of little endian uint32s: the number of nodes, then first (number of nodes + 1 entries), then
+the edges. The edges leaving node n are edges[first[n]:first[n + 1]], and each edge packs the letter (0-25) in bits
+27-31, whether the node it leads to ends a word in bit 26, and the node it leads to in bits 0-25. The root is node 0.
+"""
+import sys
+from array import array
+
+from ruzzle_bare_minimum import MAIN_DIR, MAX_WORD_LEN, DAWG_FILE
+
+
+class DawgNode:
+    __slots__ = ["children", "final"]
+
+    def __init__(self):
+        self.children = {}
+        self.final = False
+
+    def key(self):
+        """ Two nodes with equal keys accept exactly the same endings, so they can be merged """
+        return self.final, tuple((letter, id(child)) for letter, child in sorted(self.children.items()))
+
+
+def build_dawg(words):
+    """ Builds a minimal DAWG from sorted words (Daciuk et al.'s incremental algorithm) and returns its root. Nodes
+    are merged as soon as no later word can add to them, so the full trie is never held in memory, and words can be
+    any iterable, such as lines streamed from a file. """
+    root = DawgNode()
+    register = {}
+    unchecked = []  # (parent, letter, child) along the previous word that haven't been merged yet
+    previous = ''
+
+    def minimize(down_to):
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            key = child.key()
+            if key in register:
+                parent.children[letter] = register[key]
+            else:
+                register[key] = child
+
+    for word in words:
+        if word <= previous:
+            raise ValueError(f'Words must be sorted and unique, got {word!r} after {previous!r}')
+
+        # only the part of the previous word not shared with this one is finished
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        minimize(common)
+
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = DawgNode()
+            node.children[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+
+    minimize(0)
+    return root
+
+
+def flatten_dawg(root):
+    """ Numbers the nodes breadth first and packs them into the array format described at the top of this file """
+    nodes = [root]
+    index = {id(root): 0}
+    first = []
+    edges = []
+    for node in nodes:  # nodes grows as children are numbered
+        first.append(len(edges))
+        for letter, child in sorted(node.children.items()):
+            if id(child) not in index:
+                index[id(child)] = len(nodes)
+                nodes.append(child)
+            edges.append((ord(letter) - 65) << 27 | child.final << 26 | index[id(child)])
+    first.append(len(edges))
+    return array('I', [len(nodes)] + first + edges)
+
+
+def write_dawg(data, file_path=MAIN_DIR / DAWG_FILE):
+    """ Writes the array from flatten_dawg to file_path as little endian, without changing data """
+    if sys.byteorder == 'big':
+        data = array('I', data)
+        data.byteswap()
+    with open(file_path, 'wb') as file:
+        data.tofile(file)
+
+
+if __name__ == '__main__':
+    # the word list is already sorted, so it's streamed straight into the DAWG a line at a time
+    with open(MAIN_DIR / 'TWL06Trimmed.txt') as dict_file:
+        words = (line.strip() for line in dict_file)
+        data = flatten_dawg(build_dawg(word for word in words if 0 < len(word) <= MAX_WORD_LEN))
+    write_dawg(data)
+    print('Nodes:', data[0])
+    print('Edges:', len(data) - data[0] - 2)
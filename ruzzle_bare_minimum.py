@@ -1,43 +1,70 @@
 """
 A bare minimum ruzzle solver that takes a board as input and finds all words.
 
-This program requires a file called board.txt in the same directory as the program, and board.txt will
-contain the letters in the board and information about multipliers (optional). It will write all words
-sorted by score into a file called words.txt. The 7 prefix files (prefixes2L.txt -> prefixes8L.txt)
-are required, as well as the dictionary (TWL06Trimmed.txt). Type the board into board.txt, copying the 
-format of the attached example board. The first 4 lines of board.txt should contain the letters of the board,
-all caps and separated by spaces. Line 5 is blank, and lines 6-9 contain information about multipliers. 
-2, 3, D, T, and - are DW, TW, DL, TL, and nothing, respectively. If you don't want to input multipliers 
-just set all 16 characters to - (scores and word order won't be accurate). There are additional configuration 
-options such as changing the main directory, board file name, and whether or not to print extra information.
+This program requires a file called board.txt in the same directory as the program, and board.txt will contain
+the letters in the board and information about multipliers (optional). It will write all words sorted by score
+into a file called words.txt. The compressed dictionary (TWL06Trimmed.dawg, made from TWL06Trimmed.txt by
+build_dawg.py) is required, and is loaded into a trie which is walked alongside the search. Type the board
+into board.txt, copying the format of the attached example board. The first 4 lines of board.txt should
+contain the letters of the board, all caps and separated by spaces. Line 5 is blank, and lines 6-9 contain
+information about multipliers. 2, 3, D, T, and - are DW, TW, DL, TL, and nothing, respectively. If you don't
+want to input multipliers just set all 16 characters to - (scores and word order won't be accurate). There are
+additional configuration options such as changing the main directory, board file name, and whether or not to
+print extra information.
 
 Author: David Chen
 """
-from collections import defaultdict
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
+# numpy and numba are optional, and only imported by load_numpy and load_numba when USE_NUMPY or USE_NUMBA is set
+np = njit = None
+NUMPY_MISSING = NUMBA_MISSING = False  # set once an import has failed, so it isn't retried on every solve
+
 """ Configure program settings"""
 MAIN_DIR = Path('./')
 PATH_TO_BOARD = "board.txt"
+DAWG_FILE = "TWL06Trimmed.dawg"  # made from TWL06Trimmed.txt by build_dawg.py
 PRINT_INFO = True
 
 """ Ruzzle Rules """
 MIN_WORD_LEN = 2
 MAX_WORD_LEN = 12
-BOARD_SIZE = 4
+# point value of each letter (no bonuses), indexed by letter code (0-25 for A-Z)
+LETTER_POINTS = bytes([1, 4, 4, 2, 1, 4, 3, 4, 1, 10, 5, 1, 3, 1, 1, 4, 10, 1, 1, 1, 2, 4, 4, 8, 4, 8])
+LETTER_MULTS = {'D': 2, 'T': 3}
+WORD_MULTS = {'2': 2, '3': 3}
+# bonus points for the length of a word, indexed by length
+LENGTH_BONUS = tuple(max(0, 5 * (length - 4)) for length in range(MAX_WORD_LEN + 1))
 
 """ These options can be tweaked to improve performance if necessary."""
-PREFIX_LOWER_BOUND = 2
-PREFIX_UPPER_BOUND = 8
-
-""" These store the dictionary and prefixes at run time. """
+# Compile the search with numba when it's installed. The compiled search is faster per board, but loading numba takes
+# longer than a single Python search, so this only pays off when solving many boards.
+USE_NUMBA = False
+# Search with numpy when it's installed and numba isn't used, extending every partial word by one letter at a time. On
+# a 4x4 board there are too few partial words for this to beat the Python search, it's meant for larger boards of up
+# to MAX_MASK_CELLS cells.
+USE_NUMPY = False
+# The numba and numpy searches keep the visited cells of each partial word in a 64 bit int, so larger boards always use
+# the Python search.
+MAX_MASK_CELLS = 64
+# Number of workers to split the search from each start cell between. Starting workers takes longer than solving a
+# single board, so this only helps on boards much larger than 4x4.
+WORKERS = 1
+
+""" Index of the end of word flag in a trie node, which comes after the children for the 26 letters. """
+WORD_END = 26
+
+""" These store the dictionary DAWG, and its array form for numba, at run time. """
 DICTIONARY = None
-PREFIXES = None
+TRIE_ARRAYS = None
 
 
 class RuzzleSolver:
-    __slots__ = ["board", "word_mults", "board_size", "word_int_mults",
-                 "points", "graph", "possible_words", "words_info"]
+    __slots__ = ["board", "word_mults", "board_size", "flat_board", "letter_codes", "cell_bits", "word_int_mults",
+                 "points", "graph", "steps", "possible_words", "words_info"]
 
     def __init__(self, board, word_mults, board_size=None):
         if board_size is None:
@@ -46,18 +73,22 @@ class RuzzleSolver:
         self.board = board
         self.word_mults = word_mults
         self.board_size = board_size
+
+        # the board is stored flat, cell (x, y) is at index x * board_size + y
+        self.flat_board = [letter for row in board for letter in row]
+        self.letter_codes = bytes(ord(letter) - 65 for letter in self.flat_board)  # 0-25 for A-Z, to index trie nodes
+        self.cell_bits = max(1, (len(self.flat_board) - 1).bit_length())  # bits needed to store one cell index
         self.word_int_mults = self.word_mults_to_int_array()
         self.points = self.get_points()
         self.graph = self.gen_graph()
-        self.possible_words = []
+        self.steps = self.gen_steps()
+        self.possible_words = {}
         self.words_info = {}
 
-        """ Initialize DICTIONARY and PREFIXES if they're not yet read. """
-        global DICTIONARY, PREFIXES
+        """ Initialize DICTIONARY if it's not yet read. """
+        global DICTIONARY
         if DICTIONARY is None:
             DICTIONARY = get_dict()
-        if PREFIXES is None:
-            PREFIXES = get_prefixes()
 
     @classmethod
     def open(cls, file_path=MAIN_DIR / "board.txt", board_size=None):
@@ -80,162 +111,452 @@ class RuzzleSolver:
         board = cls.open(file_path, board_size)
         return board.all_combos()
 
-    def dfs(self, visited, s, word, word_pts, word_mult, path):
-        """Start at point s and search for words, keeping track of the word, points, and multiplier"""
-        len_word = len(word)
-
-        # store all >2 letter possible words in words_info if they are actual words
-        if len_word >= MIN_WORD_LEN and word in DICTIONARY:
-            score = word_pts * word_mult
-            bonus = 0 if len_word < 4 else 5 * (len_word - 4)  # length bonus
-            self.possible_words.append((word, score + bonus, path[:]))  # append copy of path
-
-        visited[s] = True  # begin DFS, make sure no overlaps
-        path.append(None)
-
-        len_word += 1
-        for v in self.graph[s]:  # graph[s] contains the adjacent points
-            if not visited[v]:
-                x, y = v
-
-                path[-1] = v  # add position to path list
-                temp_word = word + self.board[x][y]
-
-                if len_word >= MIN_WORD_LEN:
-                    if PREFIX_LOWER_BOUND <= len_word <= PREFIX_UPPER_BOUND\
-                            and temp_word not in PREFIXES[len_word - PREFIX_LOWER_BOUND]:
-                        continue
-
-                    # there are no words greater than 12 letters (based on ruzzle database), so stop searching
-                    if len_word == MAX_WORD_LEN and temp_word in DICTIONARY:
-                        score = word_pts * word_mult
-                        bonus = 0 if len_word < 4 else 5 * (len_word - 4)  # length bonus
-                        self.possible_words.append((word, score + bonus, path))  # append copy of path
-                        continue
-
-                visited[v] = True
-
-                # search from this new point
-                self.dfs(visited, v, temp_word, word_pts + self.points[x][y],
-                         word_mult * self.word_int_mults[x][y], path)
-
-                # reset everything to continue to search in other directions
-                visited[v] = False
-
-        del path[-1]
-
     def all_combos(self):
-        """ Returns all possible combinations of letters in board"""
+        """ Returns all words in board as a dict of word: (score, path), keeping the best scoring path for words that
+        can be made more than one way. path is the packed integer form of the cells used (see decode_path) """
         if self.possible_words:
             return self.possible_words
 
-        for x in range(BOARD_SIZE):
-            for y in range(BOARD_SIZE):
-                visited = {(i, j): False for i in range(BOARD_SIZE) for j in range(BOARD_SIZE)}
-                self.dfs(visited, (x, y), self.board[x][y], self.points[x][y], self.word_int_mults[x][y], [(x, y)])
-        return self.possible_words
-
-    def check_words(self, remove_bases=False):
-        """returns actual words and points and removes base words if True (removes 'sleep' if 'sleeping' is a word)"""
-        # Keep actual words and sort by score (to keep the best words).
-        if not self.possible_words:
-            self.all_combos()
-
-        words_info = [word for word in self.possible_words if word[0] in DICTIONARY]
-        words_info.sort(key=lambda x: x[1])
+        if len(self.flat_board) <= MAX_MASK_CELLS:
+            if USE_NUMBA and load_numba():
+                return self.compiled_combos()
+            if USE_NUMPY and load_numpy():
+                return self.vectorized_combos()
+
+        if WORKERS == 1:
+            return self.search_cells(range(len(self.flat_board)), self.possible_words)
+
+        # the searches from different start cells are independent, so split the start cells between workers. Threads
+        # only run in parallel on free-threaded builds of Python, otherwise separate processes are needed.
+        gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+        executor_class = ProcessPoolExecutor if gil_enabled else ThreadPoolExecutor
+        with executor_class(max_workers=WORKERS) as executor:
+            results = executor.map(self.search_cells, [range(i, len(self.flat_board), WORKERS) for i in range(WORKERS)])
+
+        best = self.possible_words
+        for found in results:
+            for word, (score, path) in found.items():
+                prev = best.get(word)
+                if prev is None or prev[0] < score:
+                    best[word] = (score, path)
+        return best
+
+    def search_cells(self, starts, best=None):
+        """ Searches for words starting from each cell index in starts. Returns best (a new dict if not given) updated
+        with the words found, as word: (score, path) like all_combos """
+        global DICTIONARY
+        if DICTIONARY is None:  # not yet read in this worker process
+            DICTIONARY = get_dict()
+        if best is None:
+            best = {}
+
+        # bind everything the search touches to locals, since attribute and global lookups are slow in the hot loop
+        dictionary = DICTIONARY
+        flat_board = self.flat_board
+        letter_codes = self.letter_codes
+        points = self.points
+        word_int_mults = self.word_int_mults
+        steps = self.steps
+        cell_bits = self.cell_bits
+        cell_mask = (1 << cell_bits) - 1
+        # the shift of each cell in a packed path of each length, first cell first, for reading words back out
+        word_shifts = [range((length - 1) * cell_bits, -1, -cell_bits) for length in range(MAX_WORD_LEN + 1)]
+        length_bonus = LENGTH_BONUS
+        min_word_len = MIN_WORD_LEN
+        max_word_len = MAX_WORD_LEN
+        word_end = WORD_END
+
+        # depth first search from each cell, using an explicit stack instead of recursion. Each stack entry holds the
+        # unsearched neighbours of a cell, and the trie node, points, multiplier, visited cells (one bit per cell) and
+        # packed path and number of letters up to and including that cell. The stack is always empty again once a start
+        # cell is finished, so one list is reused.
+        stack = []
+        for s in starts:
+            node = dictionary[letter_codes[s]]
+            if node is None:
+                continue
+
+            stack.append((iter(steps[s]), node, points[s], word_int_mults[s], 1 << s, s, 1))
+            while stack:
+                neighbours, node, word_pts, word_mult, visited, path, depth = stack[-1]
+                for v, bit, code, pts, mult in neighbours:
+                    # skip used cells, and letters that no words continue with
+                    if not visited & bit:
+                        child = node[code]
+                        if child is not None:
+                            break
+                else:
+                    # every neighbour has been searched, so backtrack
+                    del stack[-1]
+                    continue
+
+                path = path << cell_bits | v  # add position to path
+                word_pts += pts
+                word_mult *= mult
+                depth += 1
+
+                # store all >2 letter words in possible_words, the word is only built once the trie says it's real
+                if depth >= min_word_len and child[word_end]:
+                    score = word_pts * word_mult + length_bonus[depth]
+                    word = ''.join([flat_board[path >> shift & cell_mask] for shift in word_shifts[depth]])
+                    prev = best.get(word)
+                    if prev is None or prev[0] < score:
+                        best[word] = (score, path)
+
+                # there are no words greater than 12 letters (based on ruzzle database), so stop searching
+                if depth == max_word_len:
+                    continue
 
-        # remove 'walk' if 'walks' is a word
+                # search from this new point
+                stack.append((iter(steps[v]), child, word_pts, word_mult, visited | bit, path, depth))
+
+        return best
+
+    def compiled_combos(self):
+        """ Same as all_combos, but runs the search with the numba compiled search_board """
+        global TRIE_ARRAYS
+        if TRIE_ARRAYS is None:
+            TRIE_ARRAYS = get_trie_arrays()
+        children, is_word = TRIE_ARRAYS
+
+        # encode the board as integers: letters as 0-25, and neighbours padded with -1 to 8 per cell
+        letters = np.frombuffer(self.letter_codes, dtype=np.int8)
+        adj = self.padded_adjacency(np.int32)
+        adj_len = np.array([len(adjacent) for adjacent in self.graph], dtype=np.int32)
+        points = np.array(self.points, dtype=np.int32)
+        word_mults = np.array(self.word_int_mults, dtype=np.int32)
+
+        length_bonus = np.array(LENGTH_BONUS, dtype=np.int32)
+
+        paths, lengths, scores = search_board(letters, adj, adj_len, points, word_mults, children, is_word,
+                                              length_bonus, MIN_WORD_LEN, MAX_WORD_LEN)
+        return self.record_words(paths, lengths, scores)
+
+    def vectorized_combos(self):
+        """ Same as all_combos, but searches breadth first with numpy. Every path of the same length is kept in one
+        row of the frontier arrays, and each step extends all of them by one letter at once, so the per path work
+        happens inside numpy instead of the Python interpreter. """
+        global TRIE_ARRAYS
+        if TRIE_ARRAYS is None:
+            TRIE_ARRAYS = get_trie_arrays()
+        children, is_word = TRIE_ARRAYS
+
+        num_cells = len(self.flat_board)
+        letters = np.frombuffer(self.letter_codes, dtype=np.uint8).astype(np.intp)
+        adj = self.padded_adjacency(np.intp)
+        points = np.array(self.points, dtype=np.int64)
+        word_mults = np.array(self.word_int_mults, dtype=np.int64)
+
+        # the frontier starts with the single letter paths that begin some word
+        cells = np.arange(num_cells)
+        nodes = children[0, letters]
+        cells = cells[nodes >= 0]
+        frontier_nodes = nodes[nodes >= 0]
+        visited = np.left_shift(1, cells)
+        word_pts = points[cells]
+        word_mult = word_mults[cells]
+        paths = np.zeros((len(cells), MAX_WORD_LEN), dtype=np.int8)
+        paths[:, 0] = cells
+
+        found_paths, found_lengths, found_scores = [], [], []
+        for depth in range(2, MAX_WORD_LEN + 1):
+            if not len(cells):
+                break
+
+            # pair every path with each of its neighbours, and keep the unused cells that some word continues with
+            rows = np.repeat(np.arange(len(cells)), adj.shape[1])
+            neighbours = adj[cells].ravel()
+            keep = neighbours >= 0
+            rows, neighbours = rows[keep], neighbours[keep]
+            keep = (visited[rows] >> neighbours & 1) == 0
+            rows, neighbours = rows[keep], neighbours[keep]
+            child_nodes = children[frontier_nodes[rows], letters[neighbours]]
+            keep = child_nodes >= 0
+            rows, neighbours, child_nodes = rows[keep], neighbours[keep], child_nodes[keep]
+
+            cells = neighbours
+            frontier_nodes = child_nodes
+            visited = visited[rows] | np.left_shift(1, neighbours)
+            word_pts = word_pts[rows] + points[neighbours]
+            word_mult = word_mult[rows] * word_mults[neighbours]
+            paths = paths[rows]
+            paths[:, depth - 1] = neighbours
+
+            if depth >= MIN_WORD_LEN:
+                words = is_word[frontier_nodes]
+                found_paths.append(paths[words])
+                found_lengths.append(np.full(np.count_nonzero(words), depth))
+                found_scores.append(word_pts[words] * word_mult[words] + LENGTH_BONUS[depth])
+
+        if not found_paths:
+            return self.possible_words
+        return self.record_words(np.concatenate(found_paths), np.concatenate(found_lengths),
+                                 np.concatenate(found_scores))
+
+    def padded_adjacency(self, dtype):
+        """ Returns graph as a numpy array with a row of 8 neighbours per cell, padded with -1 """
+        adj = np.full((len(self.graph), 8), -1, dtype=dtype)
+        for s, adjacent in enumerate(self.graph):
+            adj[s, :len(adjacent)] = adjacent
+        return adj
+
+    def record_words(self, paths, lengths, scores):
+        """ Adds the words found by compiled_combos or vectorized_combos to possible_words, given as numpy arrays of
+        their paths (padded to MAX_WORD_LEN), lengths and scores """
+        best = self.possible_words
+        for path, length, score in zip(paths.tolist(), lengths.tolist(), scores.tolist()):
+            word = ''.join([self.flat_board[i] for i in path[:length]])
+            prev = best.get(word)
+            if prev is None or prev[0] < score:
+                packed_path = 0
+                for i in path[:length]:
+                    packed_path = packed_path << self.cell_bits | i
+                best[word] = (score, packed_path)
+        return best
+
+    def decode_path(self, path, length):
+        """ Unpacks a path from all_combos into a list of (x, y) positions. Paths are packed cell_bits per cell, with
+        the first cell in the highest bits. """
+        cell_mask = (1 << self.cell_bits) - 1
+        cells = [path >> shift & cell_mask for shift in range((length - 1) * self.cell_bits, -1, -self.cell_bits)]
+        return [divmod(i, self.board_size) for i in cells]
+
+    def check_words(self, remove_bases=False, with_paths=True):
+        """returns actual words and points and removes base words if True (removes 'sleep' if 'sleeping' is a word).
+        If with_paths is False, paths are not unpacked and are None in words_info."""
+        # the search only keeps the best score (and its path) for actual words, so there's nothing to filter
+        best = self.all_combos()
+
+        # remove 'walk' if 'walks' is a word. Every suffix of every word goes into a trie, where each node records the
+        # length of the longest word it came from. Walking a word from the root then ends at the node for every
+        # occurrence of it inside another word, so it's a base if that node came from a longer word.
         if remove_bases:
-            all_words = {word[0] for word in words_info}
-            words_info = {j for i, j in enumerate(words_info) if all(j[0] not in k for k in all_words)}
-
-        self.words_info = {word: (score, path) for word, score, path in words_info}
+            root = [0, {}]  # [longest word length, children]
+            for word in best:
+                for start in range(len(word)):
+                    node = root
+                    for letter in word[start:]:
+                        node = node[1].setdefault(letter, [0, {}])
+                        node[0] = max(node[0], len(word))
+
+            bases = set()
+            for word in best:
+                node = root
+                for letter in word:
+                    node = node[1][letter]
+                if node[0] > len(word):
+                    bases.add(word)
+            best = {word: info for word, info in best.items() if word not in bases}
+
+        if with_paths:
+            self.words_info = {word: (score, self.decode_path(path, len(word))) for word, (score, path) in best.items()}
+        else:
+            self.words_info = {word: (score, None) for word, (score, path) in best.items()}
         return self.words_info
 
     def write_words_to_file(self, print_info=False):
-        """ Writes all words and initial positions to words.txt. If the board has not yet been solved, will first solve
-        it. """
+        """ Writes all words and scores to words.txt. If the board has not yet been solved, will first solve it, without
+        unpacking the paths since they aren't written. """
         if not self.words_info:
-            self.all_combos()
-            self.check_words()
+            self.check_words(with_paths=False)
 
         with open(MAIN_DIR / 'words.txt', 'w') as words_file:
-            # take words_info and sort by score first, then sort by length
-            # words_info.items() is a list of tuples: [(word, (score, path)) ...]
-            high_scores = sorted(self.words_info.items(), key=lambda x: (-x[1][0], len(x[0])))
-            for word, info in high_scores:
-                print(word, info[0], file=words_file)
+            # take words_info and sort by score first, then by length, then alphabetically. The sort key is built into
+            # the tuples so that the sort compares them directly instead of calling a key function for each word.
+            high_scores = [(-score, len(word), word, score) for word, (score, path) in self.words_info.items()]
+            high_scores.sort()
+            words_file.write(''.join([f'{word} {score}\n' for _, _, word, score in high_scores]))
             if print_info:
                 print('Number of words:', len(high_scores))
-                print('Total score:', sum(info[0] for word, info in high_scores))
+                print('Total score:', sum(score for _, _, _, score in high_scores))
 
     def get_points(self):
-        """ Gets the points for each letter, including multipliers"""
-        points = []
-        for i in range(4):  # row
-            row_pts = []
-            for j in range(4):  # column
-                pts = self.get_letter_pts(self.board[i][j])
-                mult = self.word_mults[i][j]
-                if mult == 'D':
-                    pts *= 2
-                elif mult == 'T':
-                    pts *= 3
-                row_pts.append(pts)
-            points.append(row_pts)
-        return points
-
-    @staticmethod
-    def get_letter_pts(l):
-        """ Return point value for each letter (no bonuses)"""
-        letter_points = {'A': 1, 'B': 4, 'C': 4, 'D': 2, 'E': 1, 'F': 4, 'G': 3, 'H': 4, 'I': 1, 'J': 10, 'K': 5,
-                         'L': 1,
-                         'M': 3, 'N': 1, 'O': 1, 'P': 4, 'Q': 10, 'R': 1, 'S': 1, 'T': 1, 'U': 2, 'V': 4, 'W': 4,
-                         'X': 8,
-                         'Y': 4, 'Z': 8}
-        return letter_points[l]
+        """ Gets the points for each letter, including multipliers, as a flat list indexed like flat_board"""
+        flat_mults = [mult for row in self.word_mults for mult in row]
+        return [LETTER_POINTS[code] * LETTER_MULTS.get(mult, 1) for code, mult in zip(self.letter_codes, flat_mults)]
 
     def word_mults_to_int_array(self):
-        """ Converts word_mults to an array of integers representing the word score multipliers. """
-        int_word_mults = [[1] * self.board_size for _ in range(self.board_size)]
-        for i in range(self.board_size):
-            for j in range(self.board_size):
-                int_word_mults[i][j] = int(self.word_mults[i][j]) if self.word_mults[i][j].isdigit() else 1
-        return int_word_mults
+        """ Converts word_mults to a flat array of integers representing the word score multipliers. """
+        return [WORD_MULTS.get(mult, 1) for row in self.word_mults for mult in row]
 
     def gen_graph(self):
-        """stores grid positions into adjacency list"""
+        """stores flat cell indices into adjacency list"""
         directions = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
-        graph = defaultdict(list)
-        # for each point (key), store the adjacent points (values) in graph
+        graph = []
+        # for each cell index, store a tuple of the adjacent cell indices
         for x in range(self.board_size):
             for y in range(self.board_size):
-                for cx, cy in directions:
-                    if 0 <= x + cx < self.board_size and 0 <= y + cy < self.board_size:
-                        graph[(x, y)].append((x + cx, y + cy))
+                graph.append(tuple((x + cx) * self.board_size + y + cy for cx, cy in directions
+                                   if 0 <= x + cx < self.board_size and 0 <= y + cy < self.board_size))
 
         return graph
 
-
-def get_dict():
-    """ Returns set of words in dictionary (checking to see if a word is in a set is faster than a list) """
-    dict_file = MAIN_DIR / 'TWL06Trimmed.txt'
-    return set(open(dict_file).read().splitlines())
+    def gen_steps(self):
+        """ For each cell index, stores a tuple of (index, visited bit, letter code, points, word multiplier) for each
+        adjacent cell, so the search reads everything it needs about a neighbour at once """
+        return [tuple((v, 1 << v, self.letter_codes[v], self.points[v], self.word_int_mults[v]) for v in adjacent)
+                for adjacent in self.graph]
 
 
-def get_prefixes():
-    """ Returns a list of lists of prefixes of a certain number of letters """
-    prefixes = []
-    for i in range(PREFIX_LOWER_BOUND, PREFIX_UPPER_BOUND + 1):
-        with open(MAIN_DIR / f'prefixes{i}L.txt') as file:
-            prefixes.append(set(file.read().splitlines()))
-    return prefixes
+def get_dict():
+    """ Returns the words in dictionary as a trie. Each node is a list holding the child node for each letter code
+    (None if no word continues with that letter), followed by the WORD_END flag for whether the node ends a word, so
+    one list index per letter both prunes and checks words.
+    The trie is read from DAWG_FILE (see build_dawg.py for the format), so nodes are shared between words with the
+    same endings. """
+    data = array('I')
+    with open(MAIN_DIR / DAWG_FILE, 'rb') as dawg_file:
+        data.frombytes(dawg_file.read())
+    if sys.byteorder == 'big':
+        data.byteswap()
+
+    num_nodes = data[0]
+    first = data[1:num_nodes + 2]
+    edges = data[num_nodes + 2:]
+    nodes = [[None] * 26 + [False] for _ in range(num_nodes)]
+    for node, start, end in zip(nodes, first, first[1:]):
+        for edge in edges[start:end]:
+            child = nodes[edge & 0x3FFFFFF]
+            node[edge >> 27] = child
+            if edge >> 26 & 1:
+                child[WORD_END] = True
+    return nodes[0]
+
+
+def get_trie_arrays():
+    """ Reads DAWG_FILE into numpy arrays for search_board. children[node, letter] is the index of the child node for
+    that letter (-1 if there is none), and is_word[node] is whether the node ends a word. The root is node 0, and nodes
+    are numbered as in the file, so this is just a scatter of the packed edges. """
+    data = np.fromfile(MAIN_DIR / DAWG_FILE, dtype='<u4')
+    num_nodes = int(data[0])
+    first = data[1:num_nodes + 2].astype(np.int64)
+    edges = data[num_nodes + 2:]
+
+    sources = np.repeat(np.arange(num_nodes), np.diff(first))
+    targets = (edges & 0x3FFFFFF).astype(np.int32)
+    children = np.full((num_nodes, 26), -1, dtype=np.int32)
+    children[sources, edges >> 27] = targets
+    is_word = np.zeros(num_nodes, dtype=np.bool_)
+    is_word[targets[(edges >> 26 & 1) == 1]] = True
+    return children, is_word
+
+
+def search_board(letters, adj, adj_len, points, word_mults, children, is_word, length_bonus, min_word_len,
+                 max_word_len):
+    """ Integer only version of the search in all_combos, compiled with numba when it's available. Returns the paths
+    (padded to max_word_len), lengths and scores of every word found, as numpy arrays. """
+    n = letters.shape[0]
+    capacity = 1024
+    out_paths = np.empty((capacity, max_word_len), dtype=np.int8)
+    out_lengths = np.empty(capacity, dtype=np.int8)
+    out_scores = np.empty(capacity, dtype=np.int32)
+    count = 0
+
+    # the search stack, entry i describes the cell at depth i + 1 and next_adj is the next neighbour to try from it
+    visited = 0  # one bit per cell, so all_combos only uses this on boards of up to MAX_MASK_CELLS cells
+    path = np.empty(max_word_len, dtype=np.int64)
+    nodes = np.empty(max_word_len, dtype=np.int64)
+    word_pts = np.empty(max_word_len, dtype=np.int64)
+    word_mult = np.empty(max_word_len, dtype=np.int64)
+    next_adj = np.empty(max_word_len, dtype=np.int64)
+
+    for s in range(n):
+        node = children[0, letters[s]]
+        if node < 0:
+            continue
+        path[0] = s
+        nodes[0] = node
+        word_pts[0] = points[s]
+        word_mult[0] = word_mults[s]
+        next_adj[0] = 0
+        visited |= 1 << s
+        depth = 1
+
+        while depth > 0:
+            top = depth - 1
+            cell = path[top]
+            if next_adj[top] == adj_len[cell]:
+                # every neighbour has been searched, so backtrack
+                visited ^= 1 << cell
+                depth -= 1
+                continue
+            v = adj[cell, next_adj[top]]
+            next_adj[top] += 1
+            if visited >> v & 1:
+                continue
+            child = children[nodes[top], letters[v]]
+            if child < 0:
+                continue
+
+            path[depth] = v
+            nodes[depth] = child
+            word_pts[depth] = word_pts[top] + points[v]
+            word_mult[depth] = word_mult[top] * word_mults[v]
+            next_adj[depth] = 0
+            depth += 1
+
+            if depth >= min_word_len and is_word[child]:
+                if count == capacity:  # out of room, so double the size of the output arrays
+                    capacity *= 2
+                    grown_paths = np.empty((capacity, max_word_len), dtype=np.int8)
+                    grown_paths[:count] = out_paths
+                    out_paths = grown_paths
+                    grown_lengths = np.empty(capacity, dtype=np.int8)
+                    grown_lengths[:count] = out_lengths
+                    out_lengths = grown_lengths
+                    grown_scores = np.empty(capacity, dtype=np.int32)
+                    grown_scores[:count] = out_scores
+                    out_scores = grown_scores
+                out_paths[count, :depth] = path[:depth]
+                out_lengths[count] = depth
+                out_scores[count] = word_pts[depth - 1] * word_mult[depth - 1] + length_bonus[depth]
+                count += 1
+
+            if depth == max_word_len:
+                depth -= 1
+            else:
+                visited |= 1 << v
+
+    return out_paths[:count], out_lengths[:count], out_scores[:count]
+
+
+def load_numpy():
+    """ Imports numpy the first time it's called. Returns False if it isn't installed. """
+    global np, NUMPY_MISSING
+    if NUMPY_MISSING:
+        return False
+    if np is None:
+        try:
+            import numpy as np
+        except ImportError:
+            NUMPY_MISSING = True
+            return False
+    return True
+
+
+def load_numba():
+    """ Imports numpy and numba and compiles search_board, the first time it's called. Returns False if they aren't
+    installed, in which case the search runs in plain Python. Importing numba takes longer than solving a board, so
+    this is only done when USE_NUMBA is set. """
+    global njit, search_board, NUMBA_MISSING
+    if NUMBA_MISSING:
+        return False
+    if njit is None:
+        if not load_numpy():
+            NUMBA_MISSING = True
+            return False
+        try:
+            from numba import njit
+        except ImportError:
+            NUMBA_MISSING = True
+            return False
+        search_board = njit(cache=True)(search_board)
+    return True
 
 
 if __name__ == '__main__':
     # Reading data
     DICTIONARY = get_dict()
-    PREFIXES = get_prefixes()
 
     # Solving
     ruzzleSolver = RuzzleSolver.open(MAIN_DIR / "board.txt")